@@ -1,5 +1,6 @@
 from simulator import *
 from distributions import *
+from population import *
 import argparse
 import matplotlib.pyplot as plt
 import os
@@ -59,7 +60,7 @@ def getAnalysis(s: Simulator, nTrials: int) -> str:
 
     return "\n".join(result)
 
-def getInitialConditions(simulator: Simulator) -> str:
+def getEnvironment(simulator: Simulator) -> list[str]:
     result = []
     result.append(f"Environment:")
     result.append(f"successThreshold: {simulator.successThreshold}")
@@ -74,6 +75,11 @@ def getInitialConditions(simulator: Simulator) -> str:
     result.append(f"honestPerception: {simulator.honestPerceptionSensitivity}")
     result.append(f"dishonestFailure: {simulator.dishonestFailureSensitivity}")
     result.append(f"dishonestPerception: {simulator.dishonestPerceptionSensitivity}")
+
+    return result
+
+def getInitialConditions(simulator: Simulator) -> str:
+    result = getEnvironment(simulator)
     result.append(f"")
     result.append(f"Results:")
     result.append(f"numberOfTrialsRun: {simulator.numberOfTrialsRun:,}")
@@ -83,13 +89,53 @@ def getInitialConditions(simulator: Simulator) -> str:
 
     return "\n".join(result)
 
-def plotSimulator(s: Simulator, inputFile: str, outputFileDir: str):
+def getPopulationConditions(population: Population) -> str:
     """
-    guessesHonestThreshold - left and right edge?
+    Each statistic is taken per agent first, and then summarized across the agents
     """
-    fig = plt.figure(figsize=(12, 4))
-    ax = plt.subplot()
+    def acrossAgents(values: np.ndarray) -> str:
+        return getStats(UpdatableDistribution.fromMass(len(values), values.tolist()))
 
+    result = getEnvironment(population.simulator)
+    result.append(f"")
+    result.append(f"Results:")
+    result.append(f"nAgents: {population.nAgents:,}")
+    result.append(f"numberOfRoundsRun: {population.numberOfRoundsRun:,}")
+    result.append(f"guessesHonestThreshold: {acrossAgents(population.guessesHonestThresholds)}")
+    result.append(f"honestDistribution mean: {acrossAgents(population.honestMass.mean(axis=1))}")
+    result.append(f"honestDistribution max: {acrossAgents(population.honestMass.max(axis=1))}")
+    result.append(f"dishonestDistribution mean: {acrossAgents(population.dishonestMass.mean(axis=1))}")
+    result.append(f"dishonestDistribution max: {acrossAgents(population.dishonestMass.max(axis=1))}")
+
+    return "\n".join(result)
+
+def plotPopulation(ax, p: Population):
+    """
+    Histograms of the per-agent means and thresholds, since every agent has its own distributions
+    """
+    ax.hist(p.honestMass.mean(axis=1), bins=p.simulator.granularity,
+            range=(0, 1), density=True, histtype="bar",
+            label="Per-agent Honest Distribution mean",
+            alpha=0.8)
+    ax.hist(p.dishonestMass.mean(axis=1), bins=p.simulator.granularity,
+            range=(0, 1), density=True, histtype="bar",
+            label="Per-agent Dishonest Distribution mean",
+            alpha=0.8)
+    ax.hist(p.guessesHonestThresholds, bins=p.simulator.granularity,
+            density=True, histtype="bar",
+            label="Per-agent Guesses Honest Threshold",
+            alpha=0.8)
+
+    ax.axvline(p.simulator.successThreshold, label="Success Threshold",
+               color="tab:gray")
+
+    ax.axvspan((p.simulator.successThreshold + p.simulator.noiseDistribution.minValue) / 2,
+               (p.simulator.successThreshold + p.simulator.noiseDistribution.maxValue) / 2,
+               label="Region of uncertain outcome",
+               alpha=0.2,
+               color="tab:purple")
+
+def plotSingleSimulator(ax, s: Simulator):
     ax.hist(s.honestDistribution.mass, bins=s.honestDistribution.granularity,
             range=(0, 1), density=True, histtype="bar",
             label="Honest Distribution",
@@ -120,11 +166,24 @@ def plotSimulator(s: Simulator, inputFile: str, outputFileDir: str):
                alpha=0.2,
                color="tab:red")
 
+def plotSimulator(s: Simulator, inputFile: str, outputFileDir: str):
+    """
+    guessesHonestThreshold - left and right edge?
+    """
+    fig = plt.figure(figsize=(12, 4))
+    ax = plt.subplot()
+
+    if isinstance(s, Population):
+        plotPopulation(ax, s)
+        conditions = getPopulationConditions(s)
+    else:
+        plotSingleSimulator(ax, s)
+        conditions = getInitialConditions(s)
+
     ax.legend()
     plt.title(inputFile)
 
-
-    subplotText = getInitialConditions(s) + "\n\n" + getAnalysis(s, 100_000)
+    subplotText = conditions + "\n\n" + getAnalysis(s, 100_000)
     ax.text(1.02, 1, subplotText, va="top", wrap=True, fontsize=6, transform=ax.transAxes)
 
     plt.tight_layout()
@@ -154,12 +213,11 @@ class Job:
 
         print(f"Starting {self.inputFilePath}")
 
-        with open(self.inputFilePath) as f:
-            simulator = eval(f.read())
-            plotSimulator(simulator, self.inputFilePath, self.outputFilePath)
-            with nCompletedJobs.get_lock():
-                nCompletedJobs.value += 1
-                print(f"Completed {nCompletedJobs.value} of {self.nTotalJobs} ({self.inputFilePath})")
+        simulator = loadSimulation(self.inputFilePath)
+        plotSimulator(simulator, self.inputFilePath, self.outputFilePath)
+        with nCompletedJobs.get_lock():
+            nCompletedJobs.value += 1
+            print(f"Completed {nCompletedJobs.value} of {self.nTotalJobs} ({self.inputFilePath})")
 
 class JobSystem:
     @staticmethod
@@ -186,11 +244,13 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     if len(args.inputFile) == 1:
-        with open(inputFile) as f:
-            simulator = eval(f.read())
-            print(f"{args.inputFile[0]}:")
+        simulator = loadSimulation(args.inputFile[0])
+        print(f"{args.inputFile[0]}:")
+        if isinstance(simulator, Population):
+            print(getPopulationConditions(simulator))
+        else:
             print(getInitialConditions(simulator))
-            print(getAnalysis(simulator, 10_000))
+        print(getAnalysis(simulator, 10_000))
 
     else:
         JobSystem.run([Job(i, args.outputFileDir)
@@ -3,6 +3,7 @@ import os
 import multiprocessing
 from simulator import *
 from distributions import *
+from population import *
 
 class Job:
     def __init__(self, nIterations: int, simulator: Simulator,
@@ -37,8 +38,7 @@ class Job:
                 return
 
             elif self.saveFilePathExistsStrategy == "resume":
-                with open(self.saveFilePath) as f:
-                    self.simulator = eval(f.read())
+                self.simulator = loadSimulation(self.saveFilePath)
 
         if fileExisted:
             if self.saveFilePathExistsStrategy == "resume":
@@ -55,8 +55,11 @@ class Job:
 
         # save the simulation...
 
-        with open(self.saveFilePath, "w") as f:
-            f.write(repr(self.simulator))
+        if isinstance(self.simulator, Population):
+            self.simulator.save(self.saveFilePath)
+        else:
+            with open(self.saveFilePath, "w") as f:
+                f.write(repr(self.simulator))
 
         onExit("Completed")
         return
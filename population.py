@@ -0,0 +1,263 @@
+from __future__ import annotations
+from simulator import *
+from distributions import *
+import os
+import random
+
+class Population:
+    """
+    A population of agents that each learn separately, in the environment of `simulator`.
+    Every agent owns an honest and a dishonest effort distribution and a guesses honest threshold,
+    stored together as (nAgents, granularity) and (nAgents,) arrays so that a whole round
+    of games can be played and updated at once.
+    The shared distributions and threshold of `simulator` are only used as the starting point
+    and for their parameters; the update rules are `Simulator.getUpdateAmounts`.
+    All randomness comes from `rng`, which is seeded from `random` unless `seed` is passed,
+    so `random.seed()` makes population runs reproducible too.
+    """
+
+    def copyWith(self, **kwargs) -> Population:
+        """
+        Keeps what the agents have learned, like `Simulator.copyWith`.
+        If `nAgents` or `granularity` changes, the agents can't be kept,
+        so they start over from the simulator's threshold and from fresh distributions
+        """
+
+        simulator = self.simulator.copyWith(**kwargs)
+        nAgents = kwargs.get("nAgents", self.nAgents)
+
+        if nAgents != self.nAgents or simulator.granularity != self.simulator.granularity:
+            # Simulator.copyWith keeps its shared distributions at the old granularity,
+            # so they can't be used as the starting point here
+            initialMass = np.tile(np.array(UpdatableDistribution(simulator.granularity).mass, dtype=float),
+                                  (nAgents, 1))
+            return Population(simulator, nAgents,
+                              honestMass=initialMass,
+                              dishonestMass=initialMass.copy())
+
+        return Population(simulator, nAgents, self.numberOfRoundsRun,
+                          self.guessesHonestThresholds.copy(),
+                          self.honestMass.copy(),
+                          self.dishonestMass.copy())
+
+    def __init__(self,
+                 simulator: Simulator,
+                 nAgents: int,
+
+                 numberOfRoundsRun: int = 0,
+                 guessesHonestThresholds: np.ndarray = None,
+                 honestMass: np.ndarray = None,
+                 dishonestMass: np.ndarray = None,
+                 seed: int = None):
+
+        if nAgents < 2:
+            raise ValueError(f"a Population needs at least 2 agents to play a game, got nAgents={nAgents}")
+
+        self.simulator = simulator
+        self.nAgents = nAgents
+        self.numberOfRoundsRun = numberOfRoundsRun
+
+        if guessesHonestThresholds is None:
+            guessesHonestThresholds = np.full(self.nAgents, simulator.guessesHonestThreshold.threshold, dtype=float)
+        if honestMass is None:
+            honestMass = np.tile(np.array(simulator.honestDistribution.mass, dtype=float), (self.nAgents, 1))
+        if dishonestMass is None:
+            dishonestMass = np.tile(np.array(simulator.dishonestDistribution.mass, dtype=float), (self.nAgents, 1))
+
+        self.guessesHonestThresholds = np.asarray(guessesHonestThresholds, dtype=float)
+        self.honestMass = np.asarray(honestMass, dtype=float)
+        self.dishonestMass = np.asarray(dishonestMass, dtype=float)
+
+        for name, array, expectedShape in [
+                ("guessesHonestThresholds", self.guessesHonestThresholds, (self.nAgents,)),
+                ("honestMass", self.honestMass, (self.nAgents, simulator.granularity)),
+                ("dishonestMass", self.dishonestMass, (self.nAgents, simulator.granularity))]:
+            if array.shape != expectedShape:
+                raise ValueError(f"{name} has shape {array.shape}, expected {expectedShape}")
+
+        self.rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+
+    def __repr__(self) -> str:
+        return (
+            f"Population({self.simulator!r},\n"
+            f"{self.nAgents},\n"
+            f"{self.numberOfRoundsRun},\n"
+            f"np.array({self.guessesHonestThresholds.tolist()}),\n"
+            f"np.array({self.honestMass.tolist()}),\n"
+            f"np.array({self.dishonestMass.tolist()}),)"
+        )
+
+    def save(self, saveFilePath: str):
+        """
+        Writes the arrays with `np.savez` next to `saveFilePath` (as a .npz file),
+        and writes a much shorter repr to `saveFilePath` that loads them again.
+        The .npz file is named relative to `saveFilePath`, so load it with `loadSimulation`
+        """
+
+        arraysFilePath = os.path.splitext(saveFilePath)[0] + ".npz"
+        np.savez(arraysFilePath,
+                 guessesHonestThresholds=self.guessesHonestThresholds,
+                 honestMass=self.honestMass,
+                 dishonestMass=self.dishonestMass)
+
+        with open(saveFilePath, "w") as f:
+            f.write(
+                f"Population.fromArraysFile({self.simulator!r},\n"
+                f"{self.nAgents},\n"
+                f"{self.numberOfRoundsRun},\n"
+                f"{os.path.basename(arraysFilePath)!r},\n"
+                f"saveFileDir,)"
+            )
+
+    @staticmethod
+    def fromArraysFile(simulator: Simulator, nAgents: int, numberOfRoundsRun: int,
+                       arraysFileName: str, saveFileDir: str = "") -> Population:
+        with np.load(os.path.join(saveFileDir, arraysFileName)) as arrays:
+            return Population(simulator, nAgents, numberOfRoundsRun,
+                              arrays["guessesHonestThresholds"],
+                              arrays["honestMass"],
+                              arrays["dishonestMass"])
+
+    def _getGameOutcomes(self,
+                         player1: np.ndarray,
+                         player2: np.ndarray,
+                         player1IsHonest: np.ndarray,
+                         player2IsHonest: np.ndarray):
+        """
+        Plays one game between each `player1[i]` and `player2[i]`, using each agent's own
+        distributions and threshold
+
+        returns: (communicationSucceeds: np.ndarray,
+                  player1GuessesHonest: np.ndarray,
+                  player2GuessesHonest: np.ndarray,
+                  player1SampledIndex: np.ndarray,
+                  player2SampledIndex: np.ndarray)
+        """
+
+        nGames = len(player1)
+        granularity = self.honestMass.shape[1]
+        player1SampledIndex = self.rng.integers(0, granularity, size=nGames)
+        player2SampledIndex = self.rng.integers(0, granularity, size=nGames)
+
+        player1Effort = np.where(player1IsHonest,
+                                 self.honestMass[player1, player1SampledIndex],
+                                 self.dishonestMass[player1, player1SampledIndex])
+        player2Effort = np.where(player2IsHonest,
+                                 self.honestMass[player2, player2SampledIndex],
+                                 self.dishonestMass[player2, player2SampledIndex])
+        noiseAmount = self.rng.uniform(self.simulator.noiseDistribution.minValue,
+                                       self.simulator.noiseDistribution.maxValue,
+                                       size=nGames)
+
+        communicationValue = player1Effort + player2Effort - noiseAmount
+        communicationSucceeds = self.simulator.successThreshold < communicationValue
+        player1InformationForGuess = player2Effort - noiseAmount
+        player2InformationForGuess = player1Effort - noiseAmount
+        player1GuessesHonest = self.guessesHonestThresholds[player1] <= player1InformationForGuess
+        player2GuessesHonest = self.guessesHonestThresholds[player2] <= player2InformationForGuess
+        return (
+            communicationSucceeds,
+            player1GuessesHonest,
+            player2GuessesHonest,
+            player1SampledIndex,
+            player2SampledIndex
+        )
+
+    def _sampleHonestAssignments(self, size: int) -> np.ndarray:
+        return self.rng.uniform(0, 1, size=size) <= self.simulator.honestAssignmentDistribution.p
+
+    def getSingleGameOutcome(self,
+                             player1IsHonest: bool = None,
+                             player2IsHonest: bool = None):
+        """
+        Plays one game between two different agents chosen at random.
+        Pass `player1IsHonest` or `player2IsHonest` to force a specific assignment
+
+        returns: (player1IsHonest: bool,
+                  player2IsHonest: bool,
+                  communicationSucceeds: bool,
+                  player1GuessesHonest: bool,
+                  player2GuessesHonest: bool)
+        """
+
+        if player1IsHonest is None:
+            player1IsHonest = bool(self._sampleHonestAssignments(1)[0])
+        if player2IsHonest is None:
+            player2IsHonest = bool(self._sampleHonestAssignments(1)[0])
+
+        player1, player2 = self.rng.choice(self.nAgents, size=(2, 1), replace=False)
+        (communicationSucceeds,
+         player1GuessesHonest,
+         player2GuessesHonest,
+         _,
+         _) = self._getGameOutcomes(player1, player2,
+                                    np.array([player1IsHonest]), np.array([player2IsHonest]))
+        return (
+            player1IsHonest,
+            player2IsHonest,
+            bool(communicationSucceeds[0]),
+            bool(player1GuessesHonest[0]),
+            bool(player2GuessesHonest[0])
+        )
+
+    def updateUsingGameOutcome(self, verbose: bool = False):
+        """
+        Runs one round: the agents are paired up at random (one agent sits out if nAgents is odd),
+        every pair plays one game, and then every paired agent is updated as player 2 of its own game.
+        So unlike `Simulator`, both players of a game get their "half-update".
+        """
+
+        self.numberOfRoundsRun += 1
+        if verbose:
+            print(self.numberOfRoundsRun)
+
+        nGames = self.nAgents // 2
+        pairs = self.rng.permutation(self.nAgents)[:2 * nGames].reshape(2, nGames)
+        playerA, playerB = pairs
+        playerAIsHonest = self._sampleHonestAssignments(nGames)
+        playerBIsHonest = self._sampleHonestAssignments(nGames)
+
+        (communicationSucceeds,
+         playerAGuessesHonest,
+         playerBGuessesHonest,
+         playerASampledIndex,
+         playerBSampledIndex) = self._getGameOutcomes(playerA, playerB, playerAIsHonest, playerBIsHonest)
+
+        # every game is looked at twice, once from each side, so that each agent
+        # appears exactly once as player 2 and no update below touches the same entry twice
+
+        player1IsHonest = np.concatenate((playerAIsHonest, playerBIsHonest))
+        player2 = np.concatenate((playerB, playerA))
+        player2IsHonest = np.concatenate((playerBIsHonest, playerAIsHonest))
+        player2SampledIndex = np.concatenate((playerBSampledIndex, playerASampledIndex))
+        communicationSucceeds = np.concatenate((communicationSucceeds, communicationSucceeds))
+        player1GuessesHonest = np.concatenate((playerAGuessesHonest, playerBGuessesHonest))
+        player2GuessesHonest = np.concatenate((playerBGuessesHonest, playerAGuessesHonest))
+
+        (thresholdChange,
+         outcomeEffortChange,
+         perceptionEffortChange) = self.simulator.getUpdateAmounts(player1IsHonest,
+                                                                   player2IsHonest,
+                                                                   communicationSucceeds,
+                                                                   player1GuessesHonest,
+                                                                   player2GuessesHonest)
+
+        self.guessesHonestThresholds[player2] += thresholdChange / self.simulator.guessesHonestThreshold.granularity
+
+        for mass, isSelected in [(self.honestMass, player2IsHonest),
+                                 (self.dishonestMass, ~player2IsHonest)]:
+            agents = player2[isSelected]
+            sampledIndex = player2SampledIndex[isSelected]
+            values = mass[agents, sampledIndex]
+            values = np.clip(values + outcomeEffortChange[isSelected] / self.simulator.granularity, 0, 1)
+            values = np.clip(values + perceptionEffortChange[isSelected] / self.simulator.granularity, 0, 1)
+            mass[agents, sampledIndex] = values
+
+def loadSimulation(saveFilePath: str) -> Simulator | Population:
+    """
+    Loads a saved `Simulator` or `Population`. Population saves refer to their .npz file
+    through `saveFileDir`, so they load from any working directory
+    """
+
+    with open(saveFilePath) as f:
+        return eval(f.read(), globals(), {"saveFileDir": os.path.dirname(saveFilePath)})
@@ -137,26 +137,61 @@ class Simulator:
         # note: due to the way sampling from an UpdatableDistribution works,
         # we only end up doing a "half-update" due to how player 2 acts and is perceived
 
-        if player2GuessesHonest and not player1IsHonest:
-            self.guessesHonestThreshold.increase(self.honestThresholdSensitivity)
-        elif not player2GuessesHonest and player1IsHonest:
-            self.guessesHonestThreshold.decrease(self.honestThresholdSensitivity)
+        (thresholdChange,
+         outcomeEffortChange,
+         perceptionEffortChange) = self.getUpdateAmounts(player1IsHonest,
+                                                         player2IsHonest,
+                                                         communicationSucceeds,
+                                                         player1GuessesHonest,
+                                                         player2GuessesHonest)
+
+        self.guessesHonestThreshold.increase(thresholdChange)
+
+        effortDistribution = self.honestDistribution if player2IsHonest else self.dishonestDistribution
+        effortDistribution.increase(outcomeEffortChange)
+        effortDistribution.increase(perceptionEffortChange)
+
+    def getUpdateAmounts(self,
+                         player1IsHonest,
+                         player2IsHonest,
+                         communicationSucceeds,
+                         player1GuessesHonest,
+                         player2GuessesHonest):
+        """
+        The update rules for player 2 after one game, as multiples of granularity.
+        Positive amounts are increases and negative amounts are decreases.
+        The effort distribution is the honest one if `player2IsHonest`, otherwise the dishonest one,
+        and its two changes are applied (and clamped) one after the other.
+
+        Written with arithmetic rather than branches so that it works elementwise
+        on numpy boolean arrays as well as on single bools
 
-        if player2IsHonest:
-            if communicationSucceeds:
-                self.honestDistribution.decrease(self.honestAvoidsEffortSensitivity)
+        returns: (thresholdChange,
+                  outcomeEffortChange,
+                  perceptionEffortChange)
+        """
 
-            else:
-                self.honestDistribution.increase(self.honestSuccessSensitivity)
+        player1IsDishonest = 1 - player1IsHonest
+        player2IsDishonest = 1 - player2IsHonest
+        communicationFails = 1 - communicationSucceeds
+        player1GuessesDishonest = 1 - player1GuessesHonest
+        player2GuessesDishonest = 1 - player2GuessesHonest
 
-            if not player1GuessesHonest:
-                self.honestDistribution.increase(self.honestPerceptionSensitivity)
+        thresholdChange = self.honestThresholdSensitivity * (
+            player2GuessesHonest * player1IsDishonest
+            - player2GuessesDishonest * player1IsHonest)
 
-        else:
-            if communicationSucceeds:
-                self.dishonestDistribution.decrease(self.dishonestFailureSensitivity)
+        outcomeEffortChange = (
+            player2IsHonest * (communicationFails * self.honestSuccessSensitivity
+                               - communicationSucceeds * self.honestAvoidsEffortSensitivity)
+            - player2IsDishonest * communicationSucceeds * self.dishonestFailureSensitivity)
 
-            if not player1GuessesHonest:
-                self.dishonestDistribution.increase(self.dishonestPerceptionSensitivity)
+        perceptionEffortChange = player1GuessesDishonest * (
+            player2IsHonest * self.honestPerceptionSensitivity
+            + player2IsDishonest * self.dishonestPerceptionSensitivity)
 
-         
+        return (
+            thresholdChange,
+            outcomeEffortChange,
+            perceptionEffortChange
+        )